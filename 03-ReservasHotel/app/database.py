@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -8,9 +9,26 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+def create_db_engine(url: str | None = None):
+    """Crear el engine para la URL indicada (por defecto DATABASE_URL)."""
+    url = url or DATABASE_URL
+    if url.startswith("sqlite"):
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        # SQLite en memoria: una sola conexión compartida para que todos vean las mismas tablas
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            kwargs["poolclass"] = StaticPool
+        return create_engine(url, **kwargs)
+    return create_engine(url)
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def set_engine(new_engine):
+    """Reemplazar el engine usado por SessionLocal (por ejemplo, en las pruebas)."""
+    global engine
+    engine = new_engine
+    SessionLocal.configure(bind=new_engine)
+
 Base = declarative_base()
 
 def get_db():
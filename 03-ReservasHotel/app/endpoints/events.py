@@ -0,0 +1,178 @@
+import asyncio
+import json
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models.event import Event
+from app.pubsub import subscribe, unsubscribe, to_message
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"]
+)
+
+# Segundos sin eventos antes de enviar un comentario para mantener viva la conexión
+HEARTBEAT_INTERVAL = 15
+# Eventos del outbox leídos por consulta al reenviar
+REPLAY_PAGE_SIZE = 500
+# Los ids se asignan antes del commit, así que un evento puede hacerse visible
+# después de otro con id mayor. Al reenviar se revisan también los REPLAY_WINDOW
+# ids anteriores al cursor, limitados a los creados en los últimos LATE_COMMIT_SECONDS.
+REPLAY_WINDOW = 2000
+LATE_COMMIT_SECONDS = 120
+# Ids enviados que recuerda cada conexión para no repetir eventos
+SENT_IDS_SIZE = 10000
+
+
+class _SentIds:
+    """Conjunto acotado con los últimos ids enviados a un cliente."""
+
+    def __init__(self, size: int = SENT_IDS_SIZE):
+        self._order = deque()
+        self._ids = set()
+        self._size = size
+
+    def add(self, event_id: int):
+        self._order.append(event_id)
+        self._ids.add(event_id)
+        if len(self._order) > self._size:
+            self._ids.discard(self._order.popleft())
+
+    def __contains__(self, event_id: int):
+        return event_id in self._ids
+
+
+def _to_messages(events):
+    return [to_message(e.id, e.entity, e.action, json.loads(e.payload)) for e in events]
+
+
+def _load_page(after_id: int, entity: str | None):
+    """Leer del outbox una página de eventos posteriores a after_id."""
+    db = SessionLocal()
+    try:
+        query = db.query(Event).filter(Event.id > after_id)
+        if entity:
+            query = query.filter(Event.entity == entity)
+        return _to_messages(query.order_by(Event.id).limit(REPLAY_PAGE_SIZE).all())
+    finally:
+        db.close()
+
+
+def _load_late(cursor: int, entity: str | None):
+    """Leer los eventos recientes con id <= cursor que pudieron hacer commit tarde."""
+    db = SessionLocal()
+    try:
+        since = datetime.now(timezone.utc) - timedelta(seconds=LATE_COMMIT_SECONDS)
+        query = db.query(Event).filter(
+            Event.id > cursor - REPLAY_WINDOW,
+            Event.id <= cursor,
+            Event.created_at >= since,
+        )
+        if entity:
+            query = query.filter(Event.entity == entity)
+        return _to_messages(query.order_by(Event.id).all())
+    finally:
+        db.close()
+
+
+def _outbox_bounds():
+    """Devolver (id más antiguo, id más reciente) del outbox."""
+    db = SessionLocal()
+    try:
+        return db.query(func.min(Event.id), func.max(Event.id)).one()
+    finally:
+        db.close()
+
+
+def _format(message: dict):
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+def _resync(event_id: int):
+    return f"id: {event_id}\nevent: resync\ndata: {{}}\n\n"
+
+
+async def _replay(cursor: int, entity: str | None, sent: _SentIds):
+    """Reenviar lo que el cliente no recibió: la ventana anterior al cursor y todo lo posterior, por páginas."""
+    for message in await run_in_threadpool(_load_late, cursor, entity):
+        if message["id"] not in sent:
+            yield message
+
+    after_id = cursor
+    while True:
+        page = await run_in_threadpool(_load_page, after_id, entity)
+        if not page:
+            return
+        for message in page:
+            after_id = message["id"]
+            if message["id"] not in sent:
+                yield message
+
+
+async def _stream(request: Request, last_event_id: int | None, entity: str | None):
+    # Suscribirse antes de leer el outbox para no perder eventos entre ambos pasos
+    queue = subscribe()
+    sent = _SentIds()
+    try:
+        oldest_id, newest_id = await run_in_threadpool(_outbox_bounds)
+        if last_event_id is None:
+            cursor = newest_id or 0
+        elif oldest_id is not None and last_event_id < oldest_id - 1:
+            # Los eventos pendientes ya se eliminaron del outbox: el cliente debe recargar todo
+            cursor = newest_id
+            yield _resync(cursor)
+        else:
+            cursor = last_event_id
+            sent.add(last_event_id)
+            async for message in _replay(cursor, entity, sent):
+                sent.add(message["id"])
+                cursor = max(cursor, message["id"])
+                yield _format(message)
+
+        while not await request.is_disconnected():
+            if queue.overflowed:
+                # El cliente no leyó a tiempo y se descartaron eventos: recuperarlos del outbox
+                queue.overflowed = False
+                while not queue.empty():
+                    queue.get_nowait()
+                async for message in _replay(cursor, entity, sent):
+                    sent.add(message["id"])
+                    cursor = max(cursor, message["id"])
+                    yield _format(message)
+                continue
+
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            # Se descartan solo los ids ya enviados: uno menor que el cursor puede ser un commit tardío
+            if message["id"] in sent:
+                continue
+            if entity and not message["type"].startswith(f"{entity}."):
+                continue
+            sent.add(message["id"])
+            cursor = max(cursor, message["id"])
+            yield _format(message)
+    finally:
+        unsubscribe(queue)
+
+
+# Flujo de cambios de habitaciones y reservas (Server-Sent Events)
+@router.get("/")
+async def stream_events(
+    request: Request,
+    entity: str | None = Query(None, pattern="^(room|reservation)$", description="Filtrar por room o reservation"),
+    since: int | None = Query(None, ge=0, description="Reenviar eventos con ID mayor a este"),
+    last_event_id: int | None = Header(None, description="Enviado por EventSource al reconectar"),
+):
+    return StreamingResponse(
+        _stream(request, last_event_id if last_event_id is not None else since, entity),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,6 +3,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from datetime import date
 from app.database import get_db
+from app.pubsub import record_event, publish
 from app.models.reservation import Reservation, ReservationCreate, ReservationUpdate, ReservationResponse, ReservationStatus
 from app.models.room import Room
 from app.models.guest import Guest
@@ -45,7 +46,12 @@ def create_reservation(reservation: ReservationCreate, db: Session = Depends(get
     room.is_available = False
 
     db.add(new_reservation)
+    events = [
+        record_event(db, "reservation", "created", new_reservation),
+        record_event(db, "room", "updated", room),
+    ]
     db.commit()
+    publish(*events)
     db.refresh(new_reservation)
 
     return new_reservation
@@ -77,13 +83,16 @@ def cancel_reservation(reservation_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="La reserva ya está cancelada")
 
     reservation.status = ReservationStatus.CANCELLED
+    events = [record_event(db, "reservation", "cancelled", reservation)]
 
     # Liberar la habitación
     room = db.query(Room).filter(Room.id == reservation.room_id).first()
     if room:
         room.is_available = True
+        events.append(record_event(db, "room", "updated", room))
 
     db.commit()
+    publish(*events)
     db.refresh(reservation)
     return reservation
 
@@ -107,7 +116,9 @@ def update_reservation(reservation_id: int, reservation_update: ReservationUpdat
         if room:
             reservation.total_amount = nights * float(room.price_per_night)
 
+    event = record_event(db, "reservation", "updated", reservation)
     db.commit()
+    publish(event)
     db.refresh(reservation)
     return reservation
 
@@ -119,14 +130,18 @@ def delete_reservation(reservation_id: int, db: Session = Depends(get_db)):
     if not reservation:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
 
+    events = [record_event(db, "reservation", "deleted", reservation)]
+
     # Liberar habitación si estaba confirmada
     if reservation.status == ReservationStatus.CONFIRMED:
         room = db.query(Room).filter(Room.id == reservation.room_id).first()
         if room:
             room.is_available = True
+            events.append(record_event(db, "room", "updated", room))
 
     db.delete(reservation)
     db.commit()
+    publish(*events)
     return JSONResponse(content={
         "detail": "Reserva eliminada correctamente"
     })
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.pubsub import record_event, publish
 from app.models.room import Room, RoomCreate, RoomUpdate, RoomResponse
 from app.models.reservation import Reservation, ReservationStatus
 
@@ -20,7 +21,9 @@ def create_room(room: RoomCreate, db: Session = Depends(get_db)):
 
     new_room = Room(**room.dict())
     db.add(new_room)
+    event = record_event(db, "room", "created", new_room)
     db.commit()
+    publish(event)
     db.refresh(new_room)
     return new_room
 
@@ -60,7 +63,9 @@ def update_room(room_id: int, room_update: RoomUpdate, db: Session = Depends(get
     for key, value in room_update.dict(exclude_unset=True).items():
         setattr(room, key, value)
 
+    event = record_event(db, "room", "updated", room)
     db.commit()
+    publish(event)
     db.refresh(room)
     return room
 
@@ -77,8 +82,10 @@ def delete_room(room_id: int, db: Session = Depends(get_db)):
     if reservation:
         raise HTTPException(status_code=400, detail="No se puede eliminar la habitación con reservas activas")
 
+    event = record_event(db, "room", "deleted", room)
     db.delete(room)
     db.commit()
+    publish(event)
     return JSONResponse(content={
         "detail": "Habitación eliminada correctamente"
     })
@@ -0,0 +1,353 @@
+import csv
+import enum
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, UploadFile, File, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal
+from app.pubsub import record_events, publish
+from app.models.guest import Guest, GuestCreate
+from app.models.room import Room, RoomCreate
+from app.models.reservation import Reservation, ReservationCreate, ReservationStatus
+
+router = APIRouter(
+    tags=["Import/Export"]
+)
+
+# Filas por cada inserción masiva
+CHUNK_SIZE = 500
+# Filas leídas por viaje al servidor al exportar (cursor del lado del servidor)
+EXPORT_BATCH_SIZE = 500
+# Máximo de errores de validación que se guardan por trabajo
+MAX_ERRORS = 100
+# Tiempo que se conserva un trabajo terminado y máximo de trabajos guardados
+JOB_TTL = timedelta(hours=1)
+MAX_JOBS = 1000
+
+ENTITIES = {
+    "guests": (Guest, GuestCreate),
+    "rooms": (Room, RoomCreate),
+    "reservations": (Reservation, ReservationCreate),
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+# Estado de los trabajos de importación (en memoria, por proceso)
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _get_entity(entity: str):
+    if entity not in ENTITIES:
+        raise HTTPException(status_code=404, detail="Entidad no soportada")
+    return ENTITIES[entity]
+
+
+def _get_format(fmt: str | None, filename: str | None):
+    if fmt is None and filename:
+        fmt = os.path.splitext(filename)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="Formato no soportado, use csv o jsonl")
+    return fmt
+
+
+def _update_job(job_id: str, **fields):
+    with _jobs_lock:
+        _jobs[job_id].update(fields)
+
+
+def _iter_rows(path: str, fmt: str):
+    """Leer el archivo fila por fila sin cargarlo completo en memoria."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                # Las celdas vacías se tratan como valores no informados
+                yield line_number, {k: v for k, v in row.items() if v not in ("", None)}
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    # Se decodifica al validar para registrar el error por fila
+                    yield line_number, line
+
+
+def _check_guests(db, items):
+    """Rechazar emails ya registrados o repetidos en el mismo lote."""
+    emails = {row["email"] for _, row in items}
+    taken = {email for (email,) in db.query(Guest.email).filter(Guest.email.in_(emails))}
+    valid, errors = [], []
+    for line_number, row in items:
+        if row["email"] in taken:
+            errors.append((line_number, "El email ya está registrado"))
+            continue
+        taken.add(row["email"])
+        valid.append(Guest(**row))
+    return valid, errors, []
+
+
+def _check_rooms(db, items):
+    """Rechazar números de habitación existentes o repetidos en el mismo lote."""
+    numbers = {row["room_number"] for _, row in items}
+    taken = {number for (number,) in db.query(Room.room_number).filter(Room.room_number.in_(numbers))}
+    valid, errors = [], []
+    for line_number, row in items:
+        if row["room_number"] in taken:
+            errors.append((line_number, "El número de habitación ya existe"))
+            continue
+        taken.add(row["room_number"])
+        valid.append(Room(**row))
+    return valid, errors, []
+
+
+def _check_reservations(db, items):
+    """Aplicar las mismas reglas que POST /reservations/ a cada fila.
+
+    El huésped debe existir y la habitación debe estar disponible; al reservarla
+    se marca como no disponible, así otra fila del archivo no puede tomarla.
+    """
+    guest_ids = {row["guest_id"] for _, row in items}
+    room_ids = {row["room_id"] for _, row in items}
+    guests = {guest_id for (guest_id,) in db.query(Guest.id).filter(Guest.id.in_(guest_ids))}
+    rooms = {room.id: room for room in db.query(Room).filter(Room.id.in_(room_ids))}
+
+    valid, errors, booked_rooms = [], [], []
+    for line_number, row in items:
+        room = rooms.get(row["room_id"])
+        if row["guest_id"] not in guests:
+            errors.append((line_number, "Huésped no encontrado"))
+            continue
+        if room is None or not room.is_available:
+            errors.append((line_number, "Habitación no disponible"))
+            continue
+
+        if row.get("total_amount") is None:
+            nights = (row["check_out_date"] - row["check_in_date"]).days
+            row["total_amount"] = nights * float(room.price_per_night)
+        room.is_available = False
+        booked_rooms.append(room)
+        valid.append(Reservation(**row, status=ReservationStatus.CONFIRMED))
+    return valid, errors, booked_rooms
+
+
+CHECKS = {
+    "guests": _check_guests,
+    "rooms": _check_rooms,
+    "reservations": _check_reservations,
+}
+
+
+def _import_chunk(db, entity: str, items):
+    """Validar e insertar un lote; devuelve (filas importadas, [(fila, error)]).
+
+    Si la inserción masiva viola una restricción (por ejemplo, otro usuario
+    registró el mismo email mientras tanto), se reintenta fila por fila para que
+    solo fallen las filas con problemas. Cualquier otro error de la base de
+    datos se propaga y el trabajo termina como fallido.
+    """
+    try:
+        objects, errors, booked_rooms = CHECKS[entity](db, items)
+        if not objects:
+            db.rollback()
+            return 0, errors
+        db.add_all(objects)
+        events = []
+        if entity == "rooms":
+            events = record_events(db, "room", "created", objects)
+        elif entity == "reservations":
+            events = record_events(db, "reservation", "created", objects)
+            events += record_events(db, "room", "updated", booked_rooms)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if len(items) == 1:
+            return 0, [(items[0][0], "La fila entra en conflicto con un registro existente")]
+
+        imported, errors = 0, []
+        for item in items:
+            count, row_errors = _import_chunk(db, entity, [item])
+            imported += count
+            errors += row_errors
+        return imported, errors
+
+    publish(*events)
+    return len(objects), errors
+
+
+def _record_errors(job_id: str, errors):
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["failed"] += len(errors)
+        for line_number, error in errors:
+            if len(job["errors"]) < MAX_ERRORS:
+                job["errors"].append({"row": line_number, "error": error})
+
+
+def _flush_chunk(db, entity: str, items, job_id: str):
+    imported, errors = _import_chunk(db, entity, items)
+    with _jobs_lock:
+        _jobs[job_id]["imported"] += imported
+    _record_errors(job_id, errors)
+
+
+def _prune_jobs():
+    """Eliminar los trabajos terminados hace más de JOB_TTL y, si hay más de MAX_JOBS, los más viejos.
+
+    Solo se eliminan trabajos terminados; import_data rechaza nuevos trabajos
+    mientras los que siguen en curso ocupen todo el cupo.
+    """
+    now = datetime.utcnow()
+    finished = sorted(
+        (job for job in _jobs.values() if job["finished_at"] is not None),
+        key=lambda job: job["finished_at"],
+    )
+    excess = len(_jobs) - MAX_JOBS + 1
+    for i, job in enumerate(finished):
+        if i < excess or now - job["finished_at"] > JOB_TTL:
+            del _jobs[job["job_id"]]
+
+
+def _run_import(job_id: str, entity: str, path: str, fmt: str):
+    """Validar e insertar el archivo por lotes en segundo plano."""
+    _, schema = ENTITIES[entity]
+    _update_job(job_id, status="running")
+    db = SessionLocal()
+    try:
+        chunk = []
+        for line_number, raw in _iter_rows(path, fmt):
+            with _jobs_lock:
+                _jobs[job_id]["processed"] += 1
+            try:
+                data = json.loads(raw) if isinstance(raw, str) else raw
+                chunk.append((line_number, schema(**data).dict(exclude_none=True)))
+            except (ValidationError, ValueError, TypeError) as e:
+                _record_errors(job_id, [(line_number, str(e))])
+                continue
+
+            if len(chunk) >= CHUNK_SIZE:
+                _flush_chunk(db, entity, chunk, job_id)
+                chunk = []
+
+        if chunk:
+            _flush_chunk(db, entity, chunk, job_id)
+        _update_job(job_id, status="completed", finished_at=datetime.utcnow())
+    except Exception:
+        db.rollback()
+        _update_job(job_id, status="failed", detail="Error inesperado durante la importación", finished_at=datetime.utcnow())
+    finally:
+        db.close()
+        os.remove(path)
+
+
+# Importar huéspedes, habitaciones o reservas desde CSV/JSONL
+@router.post("/import/{entity}", status_code=status.HTTP_202_ACCEPTED)
+def import_data(
+    entity: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Archivo CSV o JSONL"),
+    format: str | None = Query(None, description="csv o jsonl (por defecto según la extensión)"),
+):
+    _get_entity(entity)
+    fmt = _get_format(format, file.filename)
+
+    # Copiar el archivo a disco por bloques, el trabajo lo lee después de la respuesta
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}")
+    try:
+        with tmp:
+            shutil.copyfileobj(file.file, tmp)
+    except Exception:
+        os.remove(tmp.name)
+        raise
+
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _prune_jobs()
+        if len(_jobs) >= MAX_JOBS:
+            os.remove(tmp.name)
+            raise HTTPException(status_code=503, detail="Demasiadas importaciones en curso, intente más tarde")
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "entity": entity,
+            "format": fmt,
+            "status": "pending",
+            "processed": 0,
+            "imported": 0,
+            "failed": 0,
+            "errors": [],
+            "detail": None,
+            "created_at": datetime.utcnow(),
+            "finished_at": None,
+        }
+
+    background_tasks.add_task(_run_import, job_id, entity, tmp.name, fmt)
+    return {"job_id": job_id, "status": "pending", "status_url": f"/import/jobs/{job_id}"}
+
+
+# Consultar el progreso de una importación
+@router.get("/import/jobs/{job_id}")
+def get_import_job(job_id: str):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Trabajo de importación no encontrado")
+        return {**job, "errors": list(job["errors"])}
+
+
+def _serialize(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _iter_export(model, fmt: str):
+    """Generar el archivo fila por fila usando un cursor del lado del servidor."""
+    columns = [column.name for column in model.__table__.columns]
+    db = SessionLocal()
+    try:
+        query = db.query(model).order_by(model.id).yield_per(EXPORT_BATCH_SIZE)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for obj in query:
+                writer.writerow([_serialize(getattr(obj, name)) for name in columns])
+                if buffer.tell() >= 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for obj in query:
+                yield json.dumps({name: _serialize(getattr(obj, name)) for name in columns}, ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+
+
+# Exportar huéspedes, habitaciones o reservas en CSV/JSONL
+@router.get("/export/{entity}")
+def export_data(
+    entity: str,
+    format: str = Query("jsonl", description="csv o jsonl"),
+):
+    model, _ = _get_entity(entity)
+    fmt = _get_format(format, None)
+    return StreamingResponse(
+        _iter_export(model, fmt),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{fmt}"'},
+    )
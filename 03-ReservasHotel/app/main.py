@@ -1,6 +1,9 @@
+import asyncio
 from fastapi import FastAPI
 from app.database import engine, Base, test_connection
-from app.endpoints import guests, rooms, reservations
+from app.endpoints import guests, rooms, reservations, transfer, events
+from app.rate_limit import AdmissionControlMiddleware, metrics
+from app.pubsub import prune_events_periodically
 from scripts.migrate_database import run_migration
 
 app = FastAPI(
@@ -9,11 +12,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
-
+# Limitar ráfagas por cliente/ruta y rechazar antes de agotar el pool de conexiones
+# /events mantiene sus límites de tasa, pero sus conexiones largas no ocupan cupo del pool
+app.add_middleware(AdmissionControlMiddleware, engine=engine, stream_paths=["/events"])
 
 app.include_router(guests.router)
 app.include_router(rooms.router)
 app.include_router(reservations.router)
+app.include_router(transfer.router)
+app.include_router(events.router)
 
 
 @app.on_event("startup")
@@ -22,6 +29,7 @@ async def startup():
         if test_connection():
             print("Conexión a la base de datos verificada en el inicio.")
             run_migration()
+            app.state.prune_task = asyncio.create_task(prune_events_periodically())
     except Exception as e:
         print(f"Error durante el inicio: {e}")
         
@@ -29,5 +37,10 @@ async def startup():
 async def root():
     return {
         "message": "Bienvenido a la API de Reservas de Hotel. Visita /docs para ver la documentación.",
-        "endpoints": ["/guests", "/rooms", "/reservations"]
-    }
\ No newline at end of file
+        "endpoints": ["/guests", "/rooms", "/reservations", "/import", "/export", "/events"]
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return metrics
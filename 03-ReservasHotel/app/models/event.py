@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+# SQLAlchemy model (outbox de cambios de habitaciones y reservas)
+class Event(Base):
+    __tablename__ = "events"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False, index=True)
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String(20), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
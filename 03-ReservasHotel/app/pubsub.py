@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models.event import Event
+
+# Campos que se envían en cada evento, para que los tableros no consulten la API
+ROOM_FIELDS = ["id", "room_number", "room_type", "is_available"]
+RESERVATION_FIELDS = ["id", "guest_id", "room_id", "check_in_date", "check_out_date", "status"]
+
+# Eventos pendientes por suscriptor; si se llena, el suscriptor vuelve a leer el outbox
+QUEUE_SIZE = 1000
+
+# Días que se conservan los eventos del outbox y cada cuánto se eliminan los viejos
+RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", 7))
+PRUNE_INTERVAL = 3600
+
+_subscribers = set()
+_lock = threading.Lock()
+
+
+def _value(value):
+    if hasattr(value, "value"):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def record_event(db: Session, entity: str, action: str, obj) -> dict:
+    """Agregar el cambio al outbox dentro de la transacción actual.
+
+    Se llama antes de db.commit(); el mensaje devuelto se entrega a publish()
+    solo después de que el commit termina bien.
+    """
+    return record_events(db, entity, action, [obj])[0]
+
+
+def record_events(db: Session, entity: str, action: str, objs) -> list[dict]:
+    """Igual que record_event, pero para varios objetos con un solo flush (importaciones)."""
+    fields = ROOM_FIELDS if entity == "room" else RESERVATION_FIELDS
+    db.flush()
+    rows = []
+    for obj in objs:
+        data = {name: _value(getattr(obj, name)) for name in fields}
+        rows.append((Event(entity=entity, entity_id=obj.id, action=action, payload=json.dumps(data)), data))
+    db.add_all([event for event, _ in rows])
+    db.flush()
+    return [to_message(event.id, entity, action, data) for event, data in rows]
+
+
+def to_message(event_id: int, entity: str, action: str, data: dict) -> dict:
+    return {"id": event_id, "type": f"{entity}.{action}", "data": data}
+
+
+def publish(*messages: dict):
+    """Enviar mensajes a los suscriptores; se puede llamar desde cualquier hilo.
+
+    Se llama después del commit, así que nunca lanza errores: un suscriptor que
+    falla no debe convertir en error una escritura que ya se guardó. Los que
+    pierdan mensajes los recuperan del outbox al reconectar.
+    """
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        try:
+            for message in messages:
+                loop.call_soon_threadsafe(_put, queue, message)
+        except Exception as e:
+            if loop.is_closed():
+                # El event loop del suscriptor ya terminó: no va a volver a leer la cola
+                unsubscribe(queue)
+            else:
+                print(f"Error enviando eventos a un suscriptor: {e}")
+
+
+def _put(queue: asyncio.Queue, message: dict):
+    if queue.full():
+        queue.overflowed = True
+    else:
+        queue.put_nowait(message)
+
+
+def subscribe() -> asyncio.Queue:
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    queue.overflowed = False
+    with _lock:
+        _subscribers.add((asyncio.get_running_loop(), queue))
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue):
+    with _lock:
+        _subscribers.difference_update({s for s in _subscribers if s[1] is queue})
+
+
+def prune_events(db: Session, retention_days: int = RETENTION_DAYS) -> int:
+    """Eliminar los eventos más viejos que retention_days.
+
+    El evento más reciente nunca se elimina, así /events puede detectar cuándo
+    un cliente pidió eventos que ya no existen y pedirle que recargue.
+    """
+    newest_id = db.query(func.max(Event.id)).scalar()
+    if newest_id is None:
+        return 0
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    deleted = db.query(Event).filter(Event.created_at < cutoff, Event.id < newest_id).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def _prune_once():
+    db = SessionLocal()
+    try:
+        return prune_events(db)
+    finally:
+        db.close()
+
+
+async def prune_events_periodically():
+    """Tarea de fondo que limpia el outbox cada PRUNE_INTERVAL segundos."""
+    while True:
+        try:
+            deleted = await run_in_threadpool(_prune_once)
+            if deleted:
+                print(f"Eventos eliminados del outbox: {deleted}")
+        except Exception as e:
+            print(f"Error limpiando el outbox de eventos: {e}")
+        await asyncio.sleep(PRUNE_INTERVAL)
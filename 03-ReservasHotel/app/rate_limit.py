@@ -0,0 +1,297 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Límite general por cliente: tokens por segundo y tamaño de la ráfaga
+CLIENT_RATE = float(os.getenv("RATE_LIMIT_CLIENT_RATE", 20))
+CLIENT_BURST = float(os.getenv("RATE_LIMIT_CLIENT_BURST", 40))
+
+# Límites de los endpoints más costosos: por cliente y total de la ruta (todos los clientes)
+ROUTE_LIMITS = {
+    ("POST", "/reservations"): {
+        "client": (float(os.getenv("RATE_LIMIT_RESERVATIONS_RATE", 2)),
+                   float(os.getenv("RATE_LIMIT_RESERVATIONS_BURST", 5))),
+        "global": (float(os.getenv("RATE_LIMIT_RESERVATIONS_GLOBAL_RATE", 20)),
+                   float(os.getenv("RATE_LIMIT_RESERVATIONS_GLOBAL_BURST", 40))),
+    },
+    ("GET", "/rooms"): {
+        "client": (float(os.getenv("RATE_LIMIT_ROOMS_RATE", 10)),
+                   float(os.getenv("RATE_LIMIT_ROOMS_BURST", 20))),
+        "global": (float(os.getenv("RATE_LIMIT_ROOMS_GLOBAL_RATE", 100)),
+                   float(os.getenv("RATE_LIMIT_ROOMS_GLOBAL_BURST", 200))),
+    },
+    # Cada conexión a /events puede reenviar muchos eventos del outbox
+    ("GET", "/events"): {
+        "client": (float(os.getenv("RATE_LIMIT_EVENTS_RATE", 1)),
+                   float(os.getenv("RATE_LIMIT_EVENTS_BURST", 5))),
+        "global": (float(os.getenv("RATE_LIMIT_EVENTS_GLOBAL_RATE", 20)),
+                   float(os.getenv("RATE_LIMIT_EVENTS_GLOBAL_BURST", 50))),
+    },
+}
+
+# Backend compartido opcional (Redis) para varios procesos o servidores
+REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+# Tiempo máximo que una petición espera un cupo antes de ser rechazada
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 0.5))
+
+# Rutas que no consumen conexiones de la base de datos
+EXEMPT_PATHS = {"/", "/docs", "/redoc", "/openapi.json", "/metrics"}
+
+# Contadores expuestos en GET /metrics
+metrics = {
+    "admitted": 0,
+    "queued": 0,
+    "shed_rate_limited": 0,
+    "shed_overloaded": 0,
+    "in_flight": 0,
+    "waiting": 0,
+    "max_concurrency": None,
+    "backend": None,
+    "backend_errors": 0,
+}
+
+
+class MemoryBucketBackend:
+    """Token bucket en memoria, válido para un solo proceso."""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    async def take(self, buckets):
+        """Tomar un token de cada bucket [(clave, tasa, ráfaga)] solo si todos tienen uno.
+
+        Si alguno está vacío no se consume nada y se devuelve la espera más larga.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, rate, burst in buckets:
+                tokens, last = self._buckets.get(key, (burst, now))
+                levels.append(min(burst, tokens + (now - last) * rate))
+
+            denied = [(1 - tokens) / rate for tokens, (_, rate, _) in zip(levels, buckets) if tokens < 1]
+            spent = 0 if denied else 1
+            for tokens, (key, _, _) in zip(levels, buckets):
+                self._buckets[key] = (tokens - spent, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+        if denied:
+            return False, max(denied)
+        return True, 0.0
+
+    def _prune(self, now: float):
+        # Eliminar los buckets inactivos por más de un minuto (ya estarían llenos)
+        for key, (_, last) in list(self._buckets.items()):
+            if now - last > 60:
+                del self._buckets[key]
+
+
+class RedisBucketBackend:
+    """Token bucket compartido en Redis, actualizado de forma atómica con Lua.
+
+    Si Redis no responde, se usa un bucket en memoria para no convertir la
+    caída de Redis en errores 500 de toda la API.
+    """
+
+    # ARGV: now, y por cada clave su tasa y ráfaga. Primero revisa todos los
+    # buckets y solo descuenta si todos tienen un token.
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local levels = {}
+    local retry_after = 0
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[i * 2])
+        local burst = tonumber(ARGV[i * 2 + 1])
+        local data = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(data[1]) or burst
+        local ts = tonumber(data[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+        levels[i] = tokens
+        if tokens < 1 then
+            retry_after = math.max(retry_after, (1 - tokens) / rate)
+        end
+    end
+    local allowed = 1
+    local spent = 1
+    if retry_after > 0 then
+        allowed = 0
+        spent = 0
+    end
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[i * 2])
+        local burst = tonumber(ARGV[i * 2 + 1])
+        redis.call('HSET', key, 'tokens', levels[i] - spent, 'ts', now)
+        redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+    end
+    return {allowed, tostring(retry_after)}
+    """
+
+    # Segundos sin intentar Redis después de un error
+    RETRY_INTERVAL = 5
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._errors = (redis.RedisError, OSError, asyncio.TimeoutError)
+        self._fallback = MemoryBucketBackend()
+        self._failing = False
+        self._retry_at = 0.0
+
+    async def take(self, buckets):
+        """Igual que MemoryBucketBackend.take, de forma atómica en Redis."""
+        if self._failing and time.monotonic() < self._retry_at:
+            return await self._fallback.take(buckets)
+        keys = [f"ratelimit:{key}" for key, _, _ in buckets]
+        args = [time.time()]
+        for _, rate, burst in buckets:
+            args += [rate, burst]
+        try:
+            allowed, retry_after = await self._script(keys=keys, args=args)
+        except self._errors as e:
+            if not self._failing:
+                print(f"Error en Redis, usando límites en memoria: {e}")
+                self._failing = True
+            self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+            metrics["backend_errors"] += 1
+            return await self._fallback.take(buckets)
+        if self._failing:
+            print("Conexión con Redis restablecida.")
+            self._failing = False
+        return bool(allowed), float(retry_after)
+
+
+def get_pool_capacity(engine):
+    """Conexiones que el pool de SQLAlchemy puede entregar a la vez (None si no tiene límite)."""
+    if os.getenv("ADMISSION_MAX_CONCURRENCY"):
+        return int(os.getenv("ADMISSION_MAX_CONCURRENCY"))
+    pool = engine.pool
+    if not hasattr(pool, "size"):
+        return None
+    overflow = getattr(pool, "_max_overflow", 0)
+    if overflow < 0:
+        return None
+    return pool.size() + overflow
+
+
+class AdmissionControlMiddleware:
+    """Limitar la tasa por cliente/ruta y la concurrencia según el tamaño del pool.
+
+    Las peticiones que exceden su token bucket reciben 429; las que no consiguen
+    un cupo en QUEUE_TIMEOUT segundos reciben 503. Ambas incluyen Retry-After,
+    así el pool nunca se agota esperando su propio timeout.
+
+    Las rutas de stream_paths (conexiones largas que no retienen una conexión
+    del pool) pasan por los token buckets pero no ocupan cupo de concurrencia.
+    """
+
+    def __init__(self, app, engine, exempt_paths=None, stream_paths=None, enabled=None):
+        self.app = app
+        # RATE_LIMIT_ENABLED=false desactiva el middleware completo (por ejemplo, en las pruebas)
+        if enabled is None:
+            enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+        self.exempt_paths = EXEMPT_PATHS | set(exempt_paths or ())
+        self.stream_paths = set(stream_paths or ())
+        self.backend = RedisBucketBackend(REDIS_URL) if REDIS_URL else MemoryBucketBackend()
+        self.max_concurrency = get_pool_capacity(engine)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        self.in_flight = 0
+        self.waiting = 0
+        metrics["max_concurrency"] = self.max_concurrency
+        metrics["backend"] = "redis" if REDIS_URL else "memory"
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or self._matches(scope["path"], self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        retry_after = await self._check_rate(client, scope["method"], scope["path"])
+        if retry_after is not None:
+            metrics["shed_rate_limited"] += 1
+            await self._reject(send, 429, "Demasiadas solicitudes, intente más tarde", retry_after)
+            return
+
+        if self.semaphore is None or self._matches(scope["path"], self.stream_paths):
+            metrics["admitted"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+        elif not await self._wait_for_slot():
+            metrics["shed_overloaded"] += 1
+            await self._reject(send, 503, "Servidor ocupado, intente más tarde", QUEUE_TIMEOUT)
+            return
+
+        metrics["admitted"] += 1
+        self.in_flight += 1
+        metrics["in_flight"] = self.in_flight
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            metrics["in_flight"] = self.in_flight
+            self.semaphore.release()
+
+    async def _wait_for_slot(self):
+        """Esperar un cupo como máximo QUEUE_TIMEOUT; la cola nunca supera el tamaño del pool."""
+        if self.waiting >= self.max_concurrency:
+            return False
+        metrics["queued"] += 1
+        self.waiting += 1
+        metrics["waiting"] = self.waiting
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=QUEUE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+            metrics["waiting"] = self.waiting
+
+    def _matches(self, path: str, paths):
+        return path in paths or any(
+            path.startswith(prefix.rstrip("/") + "/") for prefix in paths if prefix != "/"
+        )
+
+    async def _check_rate(self, client: str, method: str, path: str):
+        """Devolver los segundos de espera si algún bucket está vacío, o None si se permite.
+
+        Todos los buckets de la petición se revisan juntos: si uno la rechaza,
+        ninguno se descuenta, así un 429 no gasta tokens del cliente.
+        """
+        buckets = [(f"client:{client}", CLIENT_RATE, CLIENT_BURST)]
+        route = path.rstrip("/") or "/"
+        limits = ROUTE_LIMITS.get((method, route))
+        if limits:
+            buckets.append((f"route:{method}:{route}:{client}", *limits["client"]))
+            buckets.append((f"route:{method}:{route}", *limits["global"]))
+
+        allowed, retry_after = await self.backend.take(buckets)
+        return None if allowed else retry_after
+
+    async def _reject(self, send, status_code: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,6 +1,7 @@
 from datetime import date
 from sqlalchemy import inspect
-from app.database import engine, SessionLocal, Base
+from app import database
+from app.database import SessionLocal, Base
 
 def run_migration():
     """Ejecutar migración completa"""
@@ -10,14 +11,15 @@ def run_migration():
         from app.models.guest import Guest
         from app.models.room import Room
         from app.models.reservation import Reservation
+        from app.models.event import Event
         
         # Crear tablas solo si no existen
-        inspector = inspect(engine)
+        inspector = inspect(database.engine)
         existing_tables = inspector.get_table_names()
         
-        if not all(table in existing_tables for table in ['guests', 'rooms', 'reservations']):
+        if not all(table in existing_tables for table in ['guests', 'rooms', 'reservations', 'events']):
             print("Creando tablas faltantes...")
-            Base.metadata.create_all(bind=engine)
+            Base.metadata.create_all(bind=database.engine)
             print("Tablas creadas.")
         else:
             print("Las tablas ya existen.")
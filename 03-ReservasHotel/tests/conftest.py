@@ -0,0 +1,83 @@
+import os
+
+# Antes de importar la app: SQLite en memoria en lugar de SQL Server y sin límites de tasa
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import database
+from app.database import Base, SessionLocal, create_db_engine, get_db
+from app.main import app
+from app.models.guest import Guest
+from app.models.room import Room
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Engine en memoria con el esquema creado una sola vez por sesión (y por worker de xdist)."""
+    test_engine = create_db_engine("sqlite://")
+
+    # pysqlite no maneja bien BEGIN/SAVEPOINT por sí solo; se delega en SQLAlchemy
+    @event.listens_for(test_engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(test_engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    database.set_engine(test_engine)
+    Base.metadata.create_all(bind=test_engine)
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    """Sesión dentro de una transacción que se revierte al terminar cada prueba.
+
+    Los commit de los endpoints se convierten en SAVEPOINT, así que ningún dato
+    sobrevive entre pruebas. SessionLocal se enlaza a la misma conexión para el
+    código que abre su propia sesión (importación, exportación, eventos).
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    SessionLocal.configure(bind=connection, join_transaction_mode="create_savepoint")
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        SessionLocal.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+
+
+@pytest.fixture
+def client(db_session):
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    # Sin "with": no se ejecuta el evento startup (ni run_migration)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def guest(db_session):
+    guest = Guest(name="Juan Pérez", email="juan.perez@email.com", phone="1234567890")
+    db_session.add(guest)
+    db_session.commit()
+    return guest
+
+
+@pytest.fixture
+def room(db_session):
+    room = Room(room_number="101", room_type="Single", price_per_night=50.00, is_available=True)
+    db_session.add(room)
+    db_session.commit()
+    return room
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from app import pubsub
+from app.endpoints import events as events_endpoint
+from app.models.event import Event
+from app.pubsub import prune_events, publish, to_message
+
+
+class DisconnectAfter:
+    """Request falso: se desconecta después de `checks` llamadas a is_disconnected()."""
+
+    def __init__(self, checks=0):
+        self.checks = checks
+
+    async def is_disconnected(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def collect(request, last_event_id=None, entity=None):
+    async def run():
+        return [chunk async for chunk in events_endpoint._stream(request, last_event_id, entity)]
+    return asyncio.run(run())
+
+
+def add_events(db_session, count, entity="room"):
+    for i in range(count):
+        db_session.add(Event(entity=entity, entity_id=i, action="updated", payload=json.dumps({"n": i})))
+    db_session.commit()
+    return [e.id for e in db_session.query(Event).order_by(Event.id)]
+
+
+def test_replay_reads_every_page(db_session, monkeypatch):
+    monkeypatch.setattr(events_endpoint, "REPLAY_PAGE_SIZE", 2)
+    ids = add_events(db_session, 5)
+
+    chunks = collect(DisconnectAfter(), last_event_id=0)
+    assert [chunk.split("\n")[0] for chunk in chunks] == [f"id: {i}" for i in ids]
+
+
+def test_replay_filters_by_entity(client, room):
+    client.put(f"/rooms/{room.id}", json={"price_per_night": 60})
+
+    chunks = collect(DisconnectAfter(), last_event_id=0, entity="reservation")
+    assert chunks == []
+    chunks = collect(DisconnectAfter(), last_event_id=0, entity="room")
+    assert "event: room.updated" in chunks[0]
+
+
+def test_resync_when_missed_events_were_pruned(db_session):
+    ids = add_events(db_session, 4)
+    db_session.query(Event).filter(Event.id <= ids[1]).delete()
+    db_session.commit()
+
+    chunks = collect(DisconnectAfter(), last_event_id=ids[0] - 1)
+    assert chunks == [f"id: {ids[-1]}\nevent: resync\ndata: {{}}\n\n"]
+
+
+def test_live_events_are_pushed(db_session):
+    async def run():
+        stream = events_endpoint._stream(DisconnectAfter(checks=1), None, None)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.1)
+        publish(to_message(10**6, "room", "updated", {"id": 1, "is_available": False}))
+        chunk = await asyncio.wait_for(first, timeout=1)
+        await stream.aclose()
+        return chunk
+
+    assert asyncio.run(run()).startswith(f"id: {10**6}\nevent: room.updated\n")
+
+
+def test_live_events_published_out_of_id_order_are_all_pushed(db_session):
+    # La transacción con el id menor hace commit después que la del id mayor
+    async def run():
+        stream = events_endpoint._stream(DisconnectAfter(checks=2), None, None)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.1)
+        publish(to_message(10**6 + 1, "room", "updated", {"id": 2}))
+        publish(to_message(10**6, "room", "updated", {"id": 1}))
+        chunks = [await asyncio.wait_for(first, timeout=1), await asyncio.wait_for(stream.__anext__(), timeout=1)]
+        await stream.aclose()
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert [chunk.split("\n")[0] for chunk in chunks] == [f"id: {10**6 + 1}", f"id: {10**6}"]
+
+
+def test_replay_includes_recent_events_below_last_event_id(db_session):
+    # El cliente recibió el último id, pero el anterior se hizo visible después
+    ids = add_events(db_session, 3)
+
+    chunks = collect(DisconnectAfter(), last_event_id=ids[-1])
+    assert [chunk.split("\n")[0] for chunk in chunks] == [f"id: {i}" for i in ids[:-1]]
+
+
+def test_publish_drops_subscribers_with_closed_loop():
+    loop = asyncio.new_event_loop()
+    queue = asyncio.Queue()
+    with pubsub._lock:
+        pubsub._subscribers.add((loop, queue))
+    loop.close()
+
+    publish(to_message(1, "room", "updated", {"id": 1}))
+    assert all(q is not queue for _, q in pubsub._subscribers)
+
+
+def test_prune_events_keeps_newest(db_session):
+    ids = add_events(db_session, 3)
+    old = datetime.utcnow() - timedelta(days=30)
+    db_session.query(Event).update({Event.created_at: old})
+    db_session.commit()
+
+    assert prune_events(db_session, retention_days=7) == 2
+    assert [e.id for e in db_session.query(Event)] == [ids[-1]]
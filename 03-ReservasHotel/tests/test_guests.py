@@ -0,0 +1,30 @@
+def test_create_guest(client):
+    response = client.post("/guests/", json={"name": "María García", "email": "maria@email.com", "phone": "0987654321"})
+    assert response.status_code == 201
+    assert response.json()["email"] == "maria@email.com"
+
+
+def test_create_guest_duplicate_email(client, guest):
+    response = client.post("/guests/", json={"name": "Otro", "email": guest.email, "phone": "0987654321"})
+    assert response.status_code == 400
+
+
+def test_get_guest_not_found(client):
+    assert client.get("/guests/999").status_code == 404
+
+
+def test_update_guest(client, guest):
+    response = client.put(f"/guests/{guest.id}", json={"phone": "5566778899"})
+    assert response.status_code == 200
+    assert response.json()["phone"] == "5566778899"
+
+
+def test_delete_guest_with_active_reservation(client, guest, room):
+    client.post("/reservations/", json={
+        "guest_id": guest.id, "room_id": room.id, "check_in_date": "2024-12-01", "check_out_date": "2024-12-03"
+    })
+    assert client.delete(f"/guests/{guest.id}").status_code == 400
+
+
+def test_database_is_empty_between_tests(client):
+    assert client.get("/guests/").json() == []
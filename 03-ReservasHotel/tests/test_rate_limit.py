@@ -0,0 +1,149 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app import rate_limit
+from app.rate_limit import AdmissionControlMiddleware, MemoryBucketBackend, RedisBucketBackend
+
+
+def make_app(tmp_path, pool_size=5, **kwargs):
+    """App mínima con el middleware activado y un pool de pool_size conexiones."""
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=pool_size, max_overflow=0)
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, engine=engine, enabled=True, **kwargs)
+
+    @app.post("/reservations/")
+    async def create_reservation():
+        return {}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {}
+
+    return app
+
+
+async def send(app, method, path, client="10.0.0.1"):
+    transport = httpx.ASGITransport(app=app, client=(client, 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return await c.request(method, path)
+
+
+def test_route_limit_per_client_returns_429_with_retry_after(tmp_path):
+    app = make_app(tmp_path)
+    _, burst = rate_limit.ROUTE_LIMITS[("POST", "/reservations")]["client"]
+
+    async def run():
+        return [await send(app, "POST", "/reservations/") for _ in range(int(burst) + 1)]
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses[:-1]] == [200] * int(burst)
+    assert responses[-1].status_code == 429
+    assert int(responses[-1].headers["retry-after"]) >= 1
+
+
+def test_route_limit_is_shared_by_all_clients(tmp_path, monkeypatch):
+    limits = {**rate_limit.ROUTE_LIMITS[("POST", "/reservations")], "global": (0.1, 3)}
+    monkeypatch.setitem(rate_limit.ROUTE_LIMITS, ("POST", "/reservations"), limits)
+    app = make_app(tmp_path)
+
+    async def run():
+        return [await send(app, "POST", "/reservations/", client=f"10.0.0.{i}") for i in range(4)]
+
+    assert [r.status_code for r in asyncio.run(run())] == [200, 200, 200, 429]
+
+
+def test_rejected_request_does_not_spend_client_tokens(tmp_path, monkeypatch):
+    limits = {"client": (0.001, 5), "global": (0.001, 1)}
+    monkeypatch.setitem(rate_limit.ROUTE_LIMITS, ("POST", "/reservations"), limits)
+    app = FastAPI()
+
+    @app.post("/reservations/")
+    async def create_reservation():
+        return {}
+
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=5, max_overflow=0)
+    # Instancia directa para poder revisar sus buckets después de las peticiones
+    middleware = AdmissionControlMiddleware(app, engine=engine, enabled=True)
+
+    async def run():
+        first = await send(middleware, "POST", "/reservations/", client="10.0.3.1")
+        rejected = [await send(middleware, "POST", "/reservations/", client="10.0.3.2") for _ in range(3)]
+        return first, rejected
+
+    first, rejected = asyncio.run(run())
+    assert first.status_code == 200
+    assert [r.status_code for r in rejected] == [429, 429, 429]
+
+    # El bucket global rechazó; los del cliente siguen como antes de intentar
+    buckets = middleware.backend._buckets
+    assert buckets["route:POST:/reservations:10.0.3.2"][0] == pytest.approx(5, abs=0.01)
+    assert buckets["client:10.0.3.2"][0] == pytest.approx(rate_limit.CLIENT_BURST, abs=0.01)
+
+
+def test_memory_backend_takes_all_buckets_or_none():
+    backend = MemoryBucketBackend()
+    assert asyncio.run(backend.take([("a", 0.001, 2), ("b", 0.001, 1)]))[0] is True
+
+    allowed, retry_after = asyncio.run(backend.take([("a", 0.001, 2), ("b", 0.001, 1)]))
+    assert allowed is False
+    assert retry_after > 0
+    assert backend._buckets["a"][0] == pytest.approx(1, abs=0.01)
+
+
+def test_overloaded_pool_returns_503_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "QUEUE_TIMEOUT", 0.05)
+    app = make_app(tmp_path, pool_size=1)
+    shed_before = rate_limit.metrics["shed_overloaded"]
+
+    async def run():
+        return await asyncio.gather(*[send(app, "GET", "/slow", client=f"10.0.1.{i}") for i in range(3)])
+
+    statuses = sorted(r.status_code for r in asyncio.run(run()))
+    assert statuses == [200, 503, 503]
+    assert rate_limit.metrics["shed_overloaded"] - shed_before == 2
+
+
+def test_stream_paths_skip_concurrency_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "QUEUE_TIMEOUT", 0.05)
+    app = make_app(tmp_path, pool_size=1, stream_paths=["/slow"])
+
+    async def run():
+        return await asyncio.gather(*[send(app, "GET", "/slow", client=f"10.0.2.{i}") for i in range(3)])
+
+    assert [r.status_code for r in asyncio.run(run())] == [200, 200, 200]
+
+
+def test_disabled_middleware_lets_everything_through(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=1, max_overflow=0)
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, engine=engine, enabled=False)
+
+    @app.post("/reservations/")
+    async def create_reservation():
+        return {}
+
+    async def run():
+        return [await send(app, "POST", "/reservations/") for _ in range(20)]
+
+    assert {r.status_code for r in asyncio.run(run())} == {200}
+
+
+def test_redis_errors_fall_back_to_memory():
+    pytest.importorskip("redis")
+    backend = RedisBucketBackend("redis://127.0.0.1:1/0")
+
+    allowed, _ = asyncio.run(backend.take([("client:test", 1, 1)]))
+    assert allowed is True
+    assert rate_limit.metrics["backend_errors"] >= 1
+
+
+def test_metrics_endpoint(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert {"admitted", "queued", "shed_rate_limited", "shed_overloaded"} <= response.json().keys()
@@ -0,0 +1,72 @@
+from app.models.event import Event
+
+
+def make_reservation(client, guest, room):
+    return client.post("/reservations/", json={
+        "guest_id": guest.id, "room_id": room.id, "check_in_date": "2024-12-01", "check_out_date": "2024-12-04"
+    })
+
+
+def test_create_reservation_calculates_total(client, guest, room):
+    response = make_reservation(client, guest, room)
+    assert response.status_code == 201
+    assert response.json()["total_amount"] == 150.0
+    assert client.get(f"/rooms/{room.id}").json()["is_available"] is False
+
+
+def test_create_reservation_room_not_available(client, guest, room):
+    make_reservation(client, guest, room)
+    assert make_reservation(client, guest, room).status_code == 400
+
+
+def test_create_reservation_invalid_dates(client, guest, room):
+    response = client.post("/reservations/", json={
+        "guest_id": guest.id, "room_id": room.id, "check_in_date": "2024-12-04", "check_out_date": "2024-12-01"
+    })
+    assert response.status_code == 422
+
+
+def test_cancel_reservation_frees_room(client, guest, room):
+    reservation_id = make_reservation(client, guest, room).json()["id"]
+
+    response = client.put(f"/reservations/{reservation_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.get(f"/rooms/{room.id}").json()["is_available"] is True
+    assert client.put(f"/reservations/{reservation_id}/cancel").status_code == 400
+
+
+def test_reservation_changes_are_written_to_outbox(client, db_session, guest, room):
+    reservation_id = make_reservation(client, guest, room).json()["id"]
+    client.put(f"/reservations/{reservation_id}/cancel")
+
+    events = [(e.entity, e.action) for e in db_session.query(Event).order_by(Event.id)]
+    assert events == [
+        ("reservation", "created"),
+        ("room", "updated"),
+        ("reservation", "cancelled"),
+        ("room", "updated"),
+    ]
+
+
+def test_update_reservation_recalculates_total(client, guest, room):
+    reservation_id = make_reservation(client, guest, room).json()["id"]
+
+    response = client.put(f"/reservations/{reservation_id}", json={"check_out_date": "2024-12-06"})
+    assert response.status_code == 200
+    assert response.json()["total_amount"] == 250.0
+
+
+def test_update_reservation_invalid_dates(client, guest, room):
+    reservation_id = make_reservation(client, guest, room).json()["id"]
+
+    response = client.put(f"/reservations/{reservation_id}", json={"check_out_date": "2024-11-30"})
+    assert response.status_code == 400
+
+
+def test_delete_reservation_frees_room(client, guest, room):
+    reservation_id = make_reservation(client, guest, room).json()["id"]
+
+    assert client.delete(f"/reservations/{reservation_id}").status_code == 200
+    assert client.get(f"/reservations/{reservation_id}").status_code == 404
+    assert client.get(f"/rooms/{room.id}").json()["is_available"] is True
@@ -0,0 +1,21 @@
+def test_create_room(client):
+    response = client.post("/rooms/", json={"room_number": "301", "room_type": "Suite", "price_per_night": 150})
+    assert response.status_code == 201
+    assert response.json()["is_available"] is True
+
+
+def test_create_room_duplicate_number(client, room):
+    response = client.post("/rooms/", json={"room_number": room.room_number, "room_type": "Suite", "price_per_night": 150})
+    assert response.status_code == 400
+
+
+def test_filter_rooms_by_availability(client, room):
+    client.post("/rooms/", json={"room_number": "202", "room_type": "Double", "price_per_night": 80, "is_available": False})
+
+    available = client.get("/rooms/", params={"available": True}).json()
+    assert [r["room_number"] for r in available] == ["101"]
+
+
+def test_delete_room(client, room):
+    assert client.delete(f"/rooms/{room.id}").status_code == 200
+    assert client.get(f"/rooms/{room.id}").status_code == 404
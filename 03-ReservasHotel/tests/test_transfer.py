@@ -0,0 +1,121 @@
+import functools
+import tempfile
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.endpoints import transfer
+from app.models.event import Event
+
+
+def test_import_guests_csv(client):
+    data = "name,email,phone\nAna Martínez,ana@email.com,5566778899\nx,no-valido,1\n"
+    job = client.post("/import/guests", files={"file": ("huespedes.csv", data)}).json()
+
+    status = client.get(job["status_url"]).json()
+    assert status["status"] == "completed"
+    assert (status["imported"], status["failed"]) == (1, 1)
+    assert status["errors"][0]["row"] == 3
+    assert [g["email"] for g in client.get("/guests/").json()] == ["ana@email.com"]
+
+
+def test_export_rooms_jsonl(client, room):
+    response = client.get("/export/rooms", params={"format": "jsonl"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert '"room_number": "101"' in response.text
+
+
+def test_import_unknown_entity(client):
+    response = client.post("/import/payments", files={"file": ("pagos.csv", "id\n1\n")})
+    assert response.status_code == 404
+
+
+def test_import_guests_reports_duplicates_per_row(client, guest):
+    data = (
+        "name,email,phone\n"
+        "Ana Martínez,ana@email.com,5566778899\n"
+        f"Repetido,{guest.email},5566778899\n"
+        "Ana Otra,ana@email.com,5566778899\n"
+    )
+    job = client.post("/import/guests", files={"file": ("huespedes.csv", data)}).json()
+
+    status = client.get(job["status_url"]).json()
+    assert (status["imported"], status["failed"]) == (1, 2)
+    assert [e["row"] for e in status["errors"]] == [3, 4]
+
+
+def test_import_reservations_applies_booking_rules(client, db_session, guest, room):
+    data = (
+        "guest_id,room_id,check_in_date,check_out_date\n"
+        f"{guest.id},{room.id},2024-12-01,2024-12-03\n"
+        f"{guest.id},{room.id},2024-12-02,2024-12-04\n"
+        f"999,{room.id},2024-12-01,2024-12-03\n"
+    )
+    job = client.post("/import/reservations", files={"file": ("reservas.csv", data)}).json()
+
+    status = client.get(job["status_url"]).json()
+    assert (status["imported"], status["failed"]) == (1, 2)
+    assert status["errors"] == [
+        {"row": 3, "error": "Habitación no disponible"},
+        {"row": 4, "error": "Huésped no encontrado"},
+    ]
+
+    # La importación usa su propia sesión; se descarta lo que la sesión de la prueba tenía en memoria
+    db_session.expire_all()
+    reservations = client.get("/reservations/").json()
+    assert [(r["total_amount"], r["status"]) for r in reservations] == [(100.0, "confirmed")]
+    assert client.get(f"/rooms/{room.id}").json()["is_available"] is False
+
+    events = [(e.entity, e.action) for e in db_session.query(Event).order_by(Event.id)]
+    assert events == [("reservation", "created"), ("room", "updated")]
+
+
+def test_export_guests_csv(client, guest):
+    response = client.get("/export/guests", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+
+    lines = response.text.splitlines()
+    assert lines[0].split(",")[:4] == ["id", "name", "email", "phone"]
+    assert f"{guest.id},Juan Pérez,juan.perez@email.com,1234567890" in lines[1]
+
+
+def test_database_errors_fail_the_job_without_row_retries(client, monkeypatch):
+    calls = []
+
+    def unreachable(db, items):
+        calls.append(len(items))
+        raise OperationalError("SELECT 1", {}, Exception("conexión perdida"))
+
+    monkeypatch.setitem(transfer.CHECKS, "guests", unreachable)
+    data = "name,email,phone\nAna Martínez,ana@email.com,5566778899\nLuis Gómez,luis@email.com,5566778899\n"
+    job = client.post("/import/guests", files={"file": ("huespedes.csv", data)}).json()
+
+    status = client.get(job["status_url"]).json()
+    assert status["status"] == "failed"
+    assert status["errors"] == []
+    assert calls == [2]
+
+
+def test_import_rejected_while_running_jobs_fill_the_quota(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(transfer, "MAX_JOBS", 2)
+    monkeypatch.setattr(transfer, "_jobs", {
+        str(i): {"job_id": str(i), "status": "running", "finished_at": None} for i in range(2)
+    })
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", functools.partial(tempfile.NamedTemporaryFile, dir=tmp_path))
+
+    response = client.post("/import/guests", files={"file": ("huespedes.csv", "name,email,phone\n")})
+    assert response.status_code == 503
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_temp_file_removed_when_upload_copy_fails(client, monkeypatch, tmp_path):
+    def broken_copy(source, target):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(transfer.shutil, "copyfileobj", broken_copy)
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", functools.partial(tempfile.NamedTemporaryFile, dir=tmp_path))
+
+    with pytest.raises(OSError):
+        client.post("/import/guests", files={"file": ("huespedes.csv", "name,email,phone\n")})
+    assert list(tmp_path.iterdir()) == []
+